@@ -4,8 +4,12 @@ from monomer.mcp_client import McpClient
 from monomer.datasets import fetch_absorbance_results, parse_od_results
 from monomer.workflows import (
     register_workflow,
+    register_workflow_cached,
     instantiate_workflow,
     poll_workflow_completion,
+    log_status_changes,
+    load_run_history,
+    append_run_history,
 )
 from monomer.transfers import (
     ROWS,
@@ -22,8 +26,12 @@ __all__ = [
     "fetch_absorbance_results",
     "parse_od_results",
     "register_workflow",
+    "register_workflow_cached",
     "instantiate_workflow",
     "poll_workflow_completion",
+    "log_status_changes",
+    "load_run_history",
+    "append_run_history",
     "ROWS",
     "SUPPLEMENT_NAMES",
     "generate_transfer_array",
@@ -0,0 +1,26 @@
+"""JSON codec used on the HTTP hot path.
+
+Uses orjson when it is installed (``pip install monomer[fast]``) and falls
+back to the standard library otherwise. ``dumps`` always returns bytes.
+"""
+
+from __future__ import annotations
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+else:
+    import json
+
+    loads = json.loads
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
@@ -0,0 +1,59 @@
+"""Small on-disk cache for results worth keeping across agent restarts.
+
+Entries are JSON files under ``~/.monomer/<namespace>/<key>.json`` (override
+the root with ``MONOMER_CACHE_DIR``) and expire after a TTL.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("MONOMER_CACHE_DIR", Path.home() / ".monomer"))
+DEFAULT_TTL_SECONDS = 86400  # 1 day
+
+
+def cache_key(*parts: str | bytes) -> str:
+    """Hash the given parts into a stable cache key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(b"%d:" % len(part))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def load(namespace: str, key: str) -> dict | None:
+    """Return the cached value for ``key``, or None if missing or expired."""
+    path = CACHE_DIR / namespace / f"{key}.json"
+    try:
+        entry = json.loads(path.read_text())
+        expired = time.time() > entry["stored_at"] + entry["ttl_s"]
+    except (OSError, ValueError, LookupError, TypeError):
+        return None  # missing, unreadable or not an entry written by store()
+    value = entry.get("value")
+    if expired or not isinstance(value, dict):
+        return None
+    return value
+
+
+def store(
+    namespace: str,
+    key: str,
+    value: dict,
+    ttl: int = DEFAULT_TTL_SECONDS,
+) -> None:
+    """Cache ``value`` (JSON-serialisable) under ``key`` for ``ttl`` seconds."""
+    directory = CACHE_DIR / namespace
+    directory.mkdir(parents=True, exist_ok=True)
+    entry = {"value": value, "stored_at": time.time(), "ttl_s": ttl}
+
+    # Write-then-rename so a crash never leaves a half-written entry
+    tmp_path = directory / f"{key}.json.tmp"
+    tmp_path.write_text(json.dumps(entry))
+    tmp_path.replace(directory / f"{key}.json")
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import requests
+from monomer import _json
 
 if TYPE_CHECKING:
     from monomer.mcp_client import McpClient
@@ -23,12 +23,8 @@ SUPPLEMENT_NAMES = ["Glucose", "NaCl", "MgSO4"]
 
 
 def get_plate_uuid(client: McpClient, plate_barcode: str) -> str:
-    """Look up a culture plate's UUID from its barcode via MCP."""
-    plates = client.call_tool("list_culture_plates", {})
-    for p in plates:
-        if p.get("barcode") == plate_barcode:
-            return p.get("uuid", "")
-    raise RuntimeError(f"Plate '{plate_barcode}' not found on workcell")
+    """Look up a culture plate's UUID from its barcode via MCP (client-cached)."""
+    return client.get_plate_uuid(plate_barcode)
 
 
 def fetch_absorbance_results(
@@ -51,54 +47,55 @@ def fetch_absorbance_results(
     """
     plate_uuid = get_plate_uuid(client, plate_barcode)
 
-    # Fetch all datasets, ordered newest first
-    resp = requests.get(
+    # Fetch all datasets, ordered newest first (reuses the client's connection)
+    resp = client._session.get(
         f"{client.base_url}/api/datasets/",
         headers=API_HEADERS,
         params={"verbose": "1", "ordering": "-createdAt"},
         timeout=30,
     )
     resp.raise_for_status()
-    data = resp.json()
+    data = _json.loads(resp.content)
     datasets = data.get("results", data) if isinstance(data, dict) else data
 
-    # Filter for OD600 datasets matching our plate UUID
-    absorbance_datasets = []
+    # Single pass: skip datasets for other plates/wavelengths and track the
+    # earliest and latest readings that cover the target column
+    target_wells = [f"{row}{column_index}" for row in rows]
+    found_absorbance = False
+    earliest_ts = latest_ts = None
+    earliest_well_data: dict = {}
+    latest_well_data: dict = {}
     for ds in datasets:
         meta = ds.get("metadata", {})
         rm = meta.get("resultMetadata", {})
         pm = meta.get("plateMetadata", {})
-        if rm.get("measurementWavelength") == 600 and pm.get("uuid") == plate_uuid:
-            absorbance_datasets.append(ds)
-
-    if not absorbance_datasets:
-        raise RuntimeError(f"No OD600 datasets found for plate {plate_barcode}")
+        if rm.get("measurementWavelength") != 600 or pm.get("uuid") != plate_uuid:
+            continue
+        found_absorbance = True
 
-    # Collect timestamps that have data for our target column wells
-    target_wells = [f"{row}{column_index}" for row in rows]
-    column_readings: dict[str, dict] = {}
-    for ds in absorbance_datasets:
         sd = ds.get("structuredData", {})
         results = sd.get("resultsByWell", {})
         for ts, wells in results.items():
-            if any(wells.get(w) for w in target_wells):
-                column_readings[ts] = wells
+            if not any(wells.get(w) for w in target_wells):
+                continue
+            if earliest_ts is None or ts <= earliest_ts:
+                earliest_ts, earliest_well_data = ts, wells
+            if latest_ts is None or ts >= latest_ts:
+                latest_ts, latest_well_data = ts, wells
+
+    if not found_absorbance:
+        raise RuntimeError(f"No OD600 datasets found for plate {plate_barcode}")
 
-    if not column_readings:
+    if earliest_ts is None:
         raise RuntimeError(
             f"No OD600 readings found for column {column_index} wells "
             f"on plate {plate_barcode}"
         )
 
-    sorted_timestamps = sorted(column_readings.keys())
-    earliest_well_data = column_readings[sorted_timestamps[0]]
-    latest_well_data = column_readings[sorted_timestamps[-1]]
-
     # Extract the 8 wells in our target column for both timepoints
     baseline = {}
     endpoint = {}
-    for row in rows:
-        well = f"{row}{column_index}"
+    for well in target_wells:
         baseline[well] = float(earliest_well_data.get(well, 0.0))
         endpoint[well] = float(latest_well_data.get(well, 0.0))
 
@@ -125,27 +122,34 @@ def parse_od_results(
             "abs_control_od": float,   # absolute endpoint (for logging)
             "abs_center_od": float,    # absolute endpoint (for logging)
         }
+
+    Raises ValueError if ``rows`` is too short for the layout: a control row,
+    a center row and two replicate rows per supplement.
     """
-    col = column_index
+    needed = 2 + 2 * len(supplement_names)
+    if len(rows) < needed:
+        raise ValueError(
+            f"parse_od_results needs {needed} rows for {len(supplement_names)} "
+            f"supplements (control, center, 2 replicates each), got {len(rows)}"
+        )
+
     baseline = absorbance_results.get("baseline", {})
     endpoint = absorbance_results.get("endpoint", {})
 
-    def delta(well: str) -> float:
-        return endpoint.get(well, 0.0) - baseline.get(well, 0.0)
-
-    control_delta = delta(f"A{col}")
-    center_delta = delta(f"B{col}")
+    # Well names and deltas for the whole column, built once and indexed by row
+    wells = [f"{row}{column_index}" for row in rows]
+    deltas = [endpoint.get(w, 0.0) - baseline.get(w, 0.0) for w in wells]
 
     # Rows C/D, E/F, G/H map to the three supplements
-    perturbed_deltas = {}
-    row_pairs = [("C", "D"), ("E", "F"), ("G", "H")]
-    for (r1, r2), name in zip(row_pairs, supplement_names):
-        perturbed_deltas[name] = [delta(f"{r1}{col}"), delta(f"{r2}{col}")]
+    perturbed_deltas = {
+        name: deltas[i : i + 2]
+        for i, name in zip(range(2, len(wells), 2), supplement_names)
+    }
 
     return {
-        "control_od": control_delta,
-        "center_od": center_delta,
+        "control_od": deltas[0],
+        "center_od": deltas[1],
         "perturbed_ods": perturbed_deltas,
-        "abs_control_od": endpoint.get(f"A{col}", 0.0),
-        "abs_center_od": endpoint.get(f"B{col}", 0.0),
+        "abs_control_od": endpoint.get(wells[0], 0.0),
+        "abs_center_od": endpoint.get(wells[1], 0.0),
     }
@@ -8,12 +8,45 @@ from __future__ import annotations
 
 import json
 import os
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from monomer import _json
 
 DEFAULT_HOST = os.getenv("WORKCELL_HOST", "192.168.68.55")
 DEFAULT_PORT = int(os.getenv("WORKCELL_PORT", "8080"))
 
+PLATE_CACHE_TTL_SECONDS = 120  # how long a barcode → UUID lookup stays fresh
+SESSION_IDLE_TIMEOUT_SECONDS = 600  # re-initialize sessions left idle this long
+
+# Transport-level retries for a workcell that is restarting or behind a proxy.
+# urllib3 only retries idempotent methods on a bad status or read error, so a
+# tools/call POST is never replayed once the server may have acted on it;
+# connection failures (nothing was sent) are retried for every method.
+HTTP_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    raise_on_status=False,
+)
+
+
+def _rpc_body(method: str, params: dict | None = None, id_: int | None = None) -> bytes:
+    """Encode a JSON-RPC 2.0 request, or a notification when ``id_`` is None.
+
+    The constant envelope is spliced in as bytes and only ``params`` goes
+    through the JSON encoder, so polling loops don't rebuild it every call.
+    """
+    body = b'{"jsonrpc":"2.0","method":' + _json.dumps(method)
+    if id_ is not None:
+        body += b',"id":%d' % id_
+    if params is not None:
+        body += b',"params":' + _json.dumps(params)
+    return body + b"}"
+
 
 class McpClient:
     """MCP client that calls tools via HTTP Streamable Transport.
@@ -23,109 +56,274 @@ class McpClient:
 
     Usage::
 
-        client = McpClient("http://192.168.68.55:8080")
-        client.connect()
-        plates = client.call_tool("list_culture_plates", {})
+        with McpClient("http://192.168.68.55:8080") as client:
+            plates = client.call_tool("list_culture_plates", {})
+
+    All requests share one ``requests.Session`` so the TCP connection to the
+    workcell is kept alive between calls (long polling loops would otherwise
+    pay a fresh handshake on every status check).
+
+    A client is not thread-safe (nor is the ``requests.Session`` it holds), so
+    give each thread its own client.
+
+    Sessions left idle for ``idle_timeout`` seconds are ended and re-initialized
+    on the next call, and ``close()`` ends the session on the server, so idle
+    agents do not hold server-side session slots. Pass ``stateless=True`` for
+    servers running in stateless HTTP mode: no handshake, no session ID.
     """
 
-    def __init__(self, base_url: str | None = None):
+    def __init__(
+        self,
+        base_url: str | None = None,
+        stateless: bool = False,
+        idle_timeout: float | None = SESSION_IDLE_TIMEOUT_SECONDS,
+    ):
         if base_url is None:
             base_url = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
         self.base_url = base_url
         self.mcp_url = f"{base_url}/mcp"
         self.session_id: str | None = None
+        self.stateless = stateless
+        self.idle_timeout = idle_timeout
+        self._owns_session = False  # True once connect() created session_id
+        self._last_call_at = 0.0
         self._next_id = 1
+        # Cleared the first time the server refuses the server-push stream;
+        # stateless servers have no session to push on
+        self.supports_notifications = not stateless
+        # barcode → (plate UUID, monotonic expiry time)
+        self._plate_uuid_cache: dict[str, tuple[str, float]] = {}
+
+        # One pooled adapter for both the LAN workcell (http) and the cloud
+        # Monitor MCP (https), so TLS handshakes are amortised as well
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, max_retries=HTTP_RETRY
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # The best-effort session DELETE is sent once, never retried, so
+        # closing a client whose workcell is unreachable doesn't stall
+        self._no_retry_adapter = HTTPAdapter(max_retries=0)
+        self._session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+        })
+
+    def __enter__(self) -> McpClient:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """End the MCP session and release pooled HTTP connections."""
+        self._end_session()
+        self._session.close()
+        self._no_retry_adapter.close()
+
+    def get_plate_uuid(self, plate_barcode: str) -> str:
+        """Look up a culture plate's UUID from its barcode, caching the answer.
+
+        A miss refreshes the cache for every plate returned by
+        ``list_culture_plates``, so lookups for other barcodes are free too.
+        """
+        now = time.monotonic()
+        cached = self._plate_uuid_cache.get(plate_barcode)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        plates = self.call_tool("list_culture_plates", {})
+        expires_at = now + PLATE_CACHE_TTL_SECONDS
+        for p in plates:
+            if p.get("barcode"):
+                self._plate_uuid_cache[p["barcode"]] = (p.get("uuid", ""), expires_at)
+
+        cached = self._plate_uuid_cache.get(plate_barcode)
+        if cached and cached[1] > now:
+            return cached[0]
+        raise RuntimeError(f"Plate '{plate_barcode}' not found on workcell")
+
+    def invalidate_plate_cache(self) -> None:
+        """Forget all cached plate UUIDs (e.g. after a plate is re-registered)."""
+        self._plate_uuid_cache.clear()
 
     def _get_id(self) -> int:
         id_ = self._next_id
         self._next_id += 1
         return id_
 
+    def _ensure_connected(self) -> None:
+        if self.stateless:
+            return
+        if self.session_id and self._session_is_idle():
+            self._end_session()
+        if not self.session_id:
+            self.connect()
+
+    def _session_is_idle(self) -> bool:
+        # Only sessions this client opened can go idle; a session_id set by
+        # hand (e.g. for the Monitor MCP) is left alone
+        return (
+            self._owns_session
+            and self.idle_timeout is not None
+            and time.monotonic() - self._last_call_at > self.idle_timeout
+        )
+
+    def _end_session(self) -> None:
+        """Ask the server to drop the current session (best effort)."""
+        if not self.session_id or not self._owns_session:
+            return
+        request = self._session.prepare_request(requests.Request(
+            "DELETE", self.mcp_url, headers={"Mcp-Session-Id": self.session_id}
+        ))
+        try:
+            self._no_retry_adapter.send(request, timeout=5).close()
+        except requests.RequestException:
+            pass  # The server expires abandoned sessions on its own
+        self._forget_session()
+
+    def _forget_session(self) -> None:
+        self.session_id = None
+        self._owns_session = False
+
     def connect(self) -> None:
         """Initialize the MCP session."""
         # Step 1: Initialize
-        resp = requests.post(
+        resp = self._session.post(
             self.mcp_url,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream",
-            },
-            json={
-                "jsonrpc": "2.0",
-                "id": self._get_id(),
-                "method": "initialize",
-                "params": {
+            data=_rpc_body(
+                "initialize",
+                {
                     "protocolVersion": "2024-11-05",
                     "capabilities": {},
                     "clientInfo": {"name": "monomer-python", "version": "0.1"},
                 },
-            },
+                self._get_id(),
+            ),
             timeout=15,
         )
         resp.raise_for_status()
         self.session_id = resp.headers.get("mcp-session-id")
         if not self.session_id:
             raise RuntimeError("MCP server did not return a session ID")
+        self._owns_session = True
+        self._last_call_at = time.monotonic()
 
         # Step 2: Send initialized notification
-        requests.post(
+        self._session.post(
             self.mcp_url,
-            headers={
-                "Content-Type": "application/json",
-                "Mcp-Session-Id": self.session_id,
-            },
-            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers={"Mcp-Session-Id": self.session_id},
+            data=_rpc_body("notifications/initialized"),
             timeout=10,
         )
 
+    def stream_notifications(self, max_wait: float | None = None):
+        """Yield JSON-RPC messages pushed by the server on the session's SSE stream.
+
+        Opens the standalone GET stream of the Streamable HTTP transport, over
+        which the server sends notifications (e.g. ``notifications/progress``).
+        The generator ends once ``max_wait`` seconds have passed, when the
+        server closes the stream, or when the stream fails. If the server does
+        not offer the stream, ``supports_notifications`` is cleared and nothing
+        is yielded.
+        """
+        self._ensure_connected()
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+
+        try:
+            with self._session.get(
+                self.mcp_url,
+                headers={
+                    "Accept": "text/event-stream",
+                    "Mcp-Session-Id": self.session_id,
+                },
+                stream=True,
+                timeout=(10, max_wait),
+            ) as resp:
+                if resp.status_code == 404 and self._owns_session:
+                    self._forget_session()  # renewed by the next call_tool
+                    return
+                if not resp.ok:
+                    self.supports_notifications = False
+                    return
+                resp.encoding = "utf-8"  # SSE is always UTF-8
+                for line in resp.iter_lines(decode_unicode=True):
+                    # Checked on every line: keep-alive comments (": ping")
+                    # reset the read timeout, so it alone never ends the wait
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return
+                    if line and line.startswith("data: "):
+                        yield _json.loads(line[6:])
+        except requests.RequestException:
+            # Idle read timeout, dropped or truncated stream — the caller
+            # falls back to a plain poll
+            return
+
     def call_tool(self, tool_name: str, arguments: dict, timeout: int = 30):
         """Call an MCP tool and return the parsed result.
 
         Handles both structuredContent and text content responses.
         Auto-connects on first call if no session exists.
         """
-        if not self.session_id:
-            self.connect()
+        # A 404 means the server no longer knows our session (e.g. the workcell
+        # restarted) and did not run the call, so start a new session and send
+        # it once more. Hand-set session IDs can't be renewed and are left alone.
+        for attempt in (1, 2):
+            self._ensure_connected()
+            with self._session.post(
+                self.mcp_url,
+                headers={"Mcp-Session-Id": self.session_id},
+                data=_rpc_body(
+                    "tools/call",
+                    {"name": tool_name, "arguments": arguments},
+                    self._get_id(),
+                ),
+                timeout=timeout,
+                stream=True,
+            ) as resp:
+                if resp.status_code == 404 and self._owns_session and attempt == 1:
+                    self._forget_session()
+                    continue
+                resp.raise_for_status()
+                resp.encoding = "utf-8"  # SSE is always UTF-8
 
-        resp = requests.post(
-            self.mcp_url,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream",
-                "Mcp-Session-Id": self.session_id,
-            },
-            json={
-                "jsonrpc": "2.0",
-                "id": self._get_id(),
-                "method": "tools/call",
-                "params": {"name": tool_name, "arguments": arguments},
-            },
-            timeout=timeout,
-        )
-        resp.raise_for_status()
+                # Parse SSE response (event: message\ndata: {...}) line by line
+                # rather than buffering and splitting the whole body. The server
+                # ends the stream after the response, so reading on to the end
+                # is cheap and lets the connection go back to the pool.
+                payload = None
+                skipped: list[str] = []
+                for line in resp.iter_lines(decode_unicode=True):
+                    if payload is not None:
+                        continue
+                    if line.startswith("data: "):
+                        payload = _json.loads(line[6:])
+                    else:
+                        skipped.append(line)
+            break
+
+        self._last_call_at = time.monotonic()
+
+        if payload is None:
+            body = "\n".join(skipped)
+            raise RuntimeError(f"Could not parse MCP response: {body[:500]}")
+
+        result = payload.get("result", {})
+        if result.get("isError"):
+            error_text = (
+                result.get("content", [{}])[0].get("text", "Unknown error")
+            )
+            raise RuntimeError(f"MCP tool error: {error_text}")
 
-        # Parse SSE response (event: message\ndata: {...})
-        body = resp.text
-        for line in body.split("\n"):
-            if line.startswith("data: "):
-                payload = json.loads(line[6:])
-                result = payload.get("result", {})
-                if result.get("isError"):
-                    error_text = (
-                        result.get("content", [{}])[0].get("text", "Unknown error")
-                    )
-                    raise RuntimeError(f"MCP tool error: {error_text}")
-
-                # Prefer structuredContent, fall back to content[0].text
-                sc = result.get("structuredContent", {}).get("result")
-                if sc is not None:
-                    return sc
-                content = result.get("content", [])
-                if content and content[0].get("text"):
-                    try:
-                        return json.loads(content[0]["text"])
-                    except (json.JSONDecodeError, KeyError):
-                        return content[0]["text"]
-                return result
-
-        raise RuntimeError(f"Could not parse MCP response: {body[:500]}")
+        # Prefer structuredContent, fall back to content[0].text
+        sc = result.get("structuredContent", {}).get("result")
+        if sc is not None:
+            return sc
+        content = result.get("content", [])
+        if content and content[0].get("text"):
+            try:
+                return _json.loads(content[0]["text"])
+            except (json.JSONDecodeError, KeyError):
+                return content[0]["text"]
+        return result
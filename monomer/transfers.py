@@ -6,7 +6,8 @@ transfer arrays for gradient descent media optimization experiments.
 
 from __future__ import annotations
 
-from copy import deepcopy
+from bisect import bisect_left
+from functools import lru_cache
 
 # Default plate layout constants
 ROWS = ["A", "B", "C", "D", "E", "F", "G", "H"]
@@ -41,9 +42,28 @@ MIN_NOVEL_BIO_UL = 90
 # Default algorithm parameters
 DELTA_UL = 10
 
+# Rows C-H: the supplement each perturbation row bumps by +delta (2 reps each)
+PERTURBATION_ROWS = (
+    ("C", "Glucose"),
+    ("D", "Glucose"),
+    ("E", "NaCl"),
+    ("F", "NaCl"),
+    ("G", "MgSO4"),
+    ("H", "MgSO4"),
+)
+
+# Transfer emission order: Novel_Bio first (largest volume, tip reuse), then
+# supplements smallest-to-last. Grouping by source means only one tip change
+# is needed for all Novel_Bio transfers.
+SOURCE_ORDER = ("Novel_Bio", "MgSO4", "NaCl", "Glucose")
+
 # Novel_Bio well is the only one that reuses tips
 REUSE_TIP_SOURCE_WELLS = [REAGENT_WELLS["Novel_Bio"]]
 
+# Pipettes by capacity; a transfer uses the smallest one that holds its volume
+PIPETTES = ("p50", "p200", "p1000")
+PIPETTE_MAX_UL = (50, 200)  # upper bounds for all but the largest pipette
+
 
 # ---------------------------------------------------------------------------
 # Composition helpers
@@ -72,29 +92,56 @@ def apply_constraints(
     - Novel_Bio must be >= min_novel_bio
     - Sum of all components = well_volume
     """
-    result = {}
-    for name in supplement_names:
-        vol = int(round(supplements.get(name, 0)))
+    names = tuple(supplement_names)
+    volumes = _constrain_volumes(
+        tuple(supplements.get(name, 0) for name in names),
+        min_ul,
+        max_ul,
+        min_novel_bio,
+        well_volume,
+        delta,
+    )
+    return dict(zip(names, volumes))
+
+
+@lru_cache(maxsize=4096)
+def _constrain_volumes(
+    volumes: tuple,
+    min_ul: int,
+    max_ul: int,
+    min_novel_bio: int,
+    well_volume: int,
+    delta: int,
+) -> tuple[int, ...]:
+    """Memoized core of apply_constraints, keyed on hashable tuples.
+
+    Gradient descent revisits the same compositions often (every perturbation
+    of a repeated center), so most calls are a cache hit.
+    """
+    result = []
+    for vol in volumes:
+        vol = int(round(vol))
         if vol < min_ul:
             vol = 0
-        vol = min(vol, max_ul)
-        result[name] = vol
+        result.append(min(vol, max_ul))
 
-    # Ensure Novel_Bio >= min_novel_bio
-    novel_bio = compute_novel_bio(result, well_volume)
-    while novel_bio < min_novel_bio:
-        largest = max(supplement_names, key=lambda n: result[n])
+    # Ensure Novel_Bio >= min_novel_bio by trimming the largest supplement
+    # one delta at a time; the shortfall is computed once and counted down
+    excess = min_novel_bio - (well_volume - sum(result))
+    while excess > 0:
+        largest = max(range(len(result)), key=result.__getitem__)
         if result[largest] <= 0:
             break
-        result[largest] = max(0, result[largest] - delta)
-        novel_bio = compute_novel_bio(result, well_volume)
+        take = min(delta, result[largest])
+        result[largest] -= take
+        excess -= take
 
-    return result
+    return tuple(result)
 
 
 def make_perturbed(center: dict, supplement_name: str, delta: int) -> dict:
     """Create a perturbed composition: center + delta on one axis."""
-    perturbed = deepcopy(center)
+    perturbed = dict(center)
     perturbed[supplement_name] = center[supplement_name] + delta
     return apply_constraints(perturbed)
 
@@ -124,55 +171,41 @@ def generate_transfer_array(
       F: +delta NaCl (rep 2)
       G: +delta MgSO4 (rep 1)
       H: +delta MgSO4 (rep 2)
+
+    Transfers are grouped by source in SOURCE_ORDER (Novel_Bio first).
     """
-    transfers = []
     col = column_index
 
-    # Row A: Control — 180 uL Novel_Bio
-    transfers.append([reagent_wells["Novel_Bio"], f"A{col}", WELL_VOLUME_UL])
-
-    # Row B: Center point
-    novel_bio_center = compute_novel_bio(center)
-    if novel_bio_center > 0:
-        transfers.append([reagent_wells["Novel_Bio"], f"B{col}", novel_bio_center])
-    for name in supplement_names:
-        if center[name] > 0:
-            transfers.append([reagent_wells[name], f"B{col}", center[name]])
-
-    # Rows C-H: Perturbations (2 reps each for 3 supplements)
-    perturbation_rows = [
-        ("C", "D", "Glucose"),
-        ("E", "F", "NaCl"),
-        ("G", "H", "MgSO4"),
+    # Full composition (including Novel_Bio) of each row, in row order
+    row_compositions = [
+        ("A", {"Novel_Bio": WELL_VOLUME_UL}),  # Control
+        ("B", {**center, "Novel_Bio": compute_novel_bio(center)}),
     ]
-
-    for row1, row2, supplement in perturbation_rows:
-        perturbed = make_perturbed(center, supplement, delta)
-        novel_bio_pert = compute_novel_bio(perturbed)
-
-        for row in (row1, row2):
-            if novel_bio_pert > 0:
-                transfers.append(
-                    [reagent_wells["Novel_Bio"], f"{row}{col}", novel_bio_pert]
-                )
-            for name in supplement_names:
-                if perturbed[name] > 0:
-                    transfers.append(
-                        [reagent_wells[name], f"{row}{col}", perturbed[name]]
-                    )
-
-    # Sort: Novel_Bio first (largest volume, tip reuse), then supplements smallest-to-last.
-    # This groups all Novel_Bio transfers together so only one tip change is needed.
-    source_order = [
-        reagent_wells["Novel_Bio"],
-        reagent_wells["MgSO4"],
-        reagent_wells["NaCl"],
-        reagent_wells["Glucose"],
+    perturbed_by_supplement: dict[str, dict] = {}
+    for row, supplement in PERTURBATION_ROWS:
+        if supplement not in perturbed_by_supplement:
+            perturbed = make_perturbed(center, supplement, delta)
+            perturbed_by_supplement[supplement] = {
+                **perturbed,
+                "Novel_Bio": compute_novel_bio(perturbed),
+            }
+        row_compositions.append((row, perturbed_by_supplement[supplement]))
+
+    # Walk sources in SOURCE_ORDER and rows within each source, so the result
+    # comes out already grouped by source — no sort pass needed
+    components = [
+        name
+        for name in SOURCE_ORDER
+        if name == "Novel_Bio" or name in supplement_names
     ]
-    order_map = {well: i for i, well in enumerate(source_order)}
-    transfers.sort(key=lambda t: order_map.get(t[0], 99))
+    components += [name for name in supplement_names if name not in SOURCE_ORDER]
 
-    return transfers
+    return [
+        [reagent_wells[name], f"{row}{col}", volume]
+        for name in components
+        for row, composition in row_compositions
+        if (volume := composition.get(name, 0)) > 0
+    ]
 
 
 def compute_tip_consumption(
@@ -188,24 +221,16 @@ def compute_tip_consumption(
         reuse_source_wells = REUSE_TIP_SOURCE_WELLS
     reuse_set = set(reuse_source_wells)
 
-    reuse_by_pipette: dict[str, set] = {"p50": set(), "p200": set(), "p1000": set()}
-    single_counts = {"p50": 0, "p200": 0, "p1000": 0}
+    counts = dict.fromkeys(PIPETTES, 0)
+    reused: set[tuple[str, str]] = set()
 
     for source_well, _, volume in transfer_array:
-        if volume <= 50:
-            pip = "p50"
-        elif volume <= 200:
-            pip = "p200"
-        else:
-            pip = "p1000"
-
+        pip = PIPETTES[bisect_left(PIPETTE_MAX_UL, volume)]
         if source_well in reuse_set:
-            reuse_by_pipette[pip].add(source_well)
-        else:
-            single_counts[pip] += 1
-
-    return {
-        "p50": len(reuse_by_pipette["p50"]) + single_counts["p50"],
-        "p200": len(reuse_by_pipette["p200"]) + single_counts["p200"],
-        "p1000": len(reuse_by_pipette["p1000"]) + single_counts["p1000"],
-    }
+            # One tip per (pipette, source) pair, however many transfers use it
+            if (pip, source_well) in reused:
+                continue
+            reused.add((pip, source_well))
+        counts[pip] += 1
+
+    return counts
@@ -6,16 +6,36 @@ polling for completion — all via the MCP client.
 
 from __future__ import annotations
 
+import json
+import logging
 import time
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
+
+import requests
+
+from monomer import cache
 
 if TYPE_CHECKING:
     from monomer.mcp_client import McpClient
 
+log = logging.getLogger(__name__)
+
 # Defaults
-DAEMON_POLL_INTERVAL = 30  # seconds between status checks
+DAEMON_POLL_INTERVAL = 30  # max seconds between status checks
 WORKFLOW_TIMEOUT_MINUTES = 180  # max wait per workflow (3 hours)
+POLL_MAX_RETRIES = 8  # consecutive failed status checks before giving up
+POLL_MAX_BACKOFF = 300  # seconds; cap on the wait between failed checks
+REGISTRATION_CACHE_TTL = cache.DEFAULT_TTL_SECONDS  # reuse a definition ID this long
+
+# Failures a later status check can recover from; anything else (a bad URL,
+# a redirect loop) is raised straight away instead of backing off for minutes
+_TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.HTTPError,
+)
 
 
 def register_workflow(
@@ -43,12 +63,16 @@ def register_workflow(
     )
 
     # Create the named DB record
-    client.call_tool(
+    registered = client.call_tool(
         "register_workflow_definition",
         {"name": name, "file_name": file_name},
     )
 
-    # Return the assigned ID
+    # Use the ID from the registration response when the server includes it;
+    # otherwise look it up by name (one extra round trip)
+    if isinstance(registered, dict) and registered.get("id") is not None:
+        return registered["id"]
+
     definitions = client.call_tool("list_workflow_definitions", {})
     for d in definitions:
         if d["name"] == name:
@@ -57,6 +81,55 @@ def register_workflow(
     raise RuntimeError(f"Definition '{name}' not found after registration")
 
 
+def register_workflow_cached(
+    client: McpClient,
+    workflow_path: Path,
+    name: str = "Hackathon GD Agent",
+    ttl: int = REGISTRATION_CACHE_TTL,
+    refresh: bool = False,
+) -> int:
+    """Like register_workflow(), but reuses a recent registration of the same file.
+
+    The definition ID is cached on disk, keyed by workcell URL, definition name
+    and file contents, so restarting an agent with an unchanged template skips
+    the upload and registration round trips. Editing the file or changing the
+    name registers afresh.
+
+    A cached ID is checked with one read-only ``get_workflow_definition`` call
+    and registered afresh if the workcell no longer has it under this name.
+    The check cannot see a definition file overwritten in place (e.g. another
+    upload of the same file name); pass ``refresh=True`` to upload and register
+    regardless, replacing the cached ID.
+
+    :param client: Connected MCP client.
+    :param workflow_path: Path to the workflow_definition_template.py file.
+    :param name: Human-readable name shown in the Monomer UI approval queue.
+    :param ttl: Seconds a cached definition ID stays valid.
+    :param refresh: Ignore any cached ID and register again.
+    :returns: Workflow definition database ID.
+    """
+    key = cache.cache_key(client.base_url, name, workflow_path.read_bytes())
+    cached = None if refresh else cache.load("workflow_registry", key)
+    def_id = cached.get("def_id") if cached else None
+    if isinstance(def_id, int) and _definition_exists(client, def_id, name):
+        return def_id
+
+    def_id = register_workflow(client, workflow_path, name=name)
+    cache.store("workflow_registry", key, {"def_id": def_id}, ttl=ttl)
+    return def_id
+
+
+def _definition_exists(client: McpClient, definition_id: int, name: str) -> bool:
+    """True if the workcell still has ``definition_id`` registered as ``name``."""
+    try:
+        definition = client.call_tool(
+            "get_workflow_definition", {"definition_id": definition_id}
+        )
+    except RuntimeError:
+        return False  # MCP tool error: no such definition
+    return isinstance(definition, dict) and definition.get("name") == name
+
+
 def instantiate_workflow(
     client: McpClient,
     definition_id: int,
@@ -100,35 +173,163 @@ def poll_workflow_completion(
     timeout_minutes: int = WORKFLOW_TIMEOUT_MINUTES,
     poll_interval: int = DAEMON_POLL_INTERVAL,
     on_status: callable | None = None,
+    max_retries: int = POLL_MAX_RETRIES,
+    max_backoff: int = POLL_MAX_BACKOFF,
 ) -> dict:
     """Poll via MCP until a workflow instance completes.
 
+    Between status checks, waits on the session's server-push stream so a
+    notification about this instance triggers an immediate re-check. If the
+    server does not push notifications, this falls back to plain polling.
+
+    Transient HTTP failures (workcell restart, dropped Wi-Fi, 5xx responses)
+    are retried with exponential backoff rather than aborting a multi-hour
+    wait; the client opens a new MCP session if the workcell lost the old one.
+    Other 4xx responses and errors that retrying can't fix (e.g. an invalid
+    URL) are raised straight away.
+
+    While polling, the client's ``idle_timeout`` is raised to at least twice
+    ``poll_interval`` so the MCP session is not torn down and re-initialized
+    between checks; the caller's setting is restored on return.
+
     Args:
         client: MCP client instance.
         uuid: Workflow instance UUID.
         timeout_minutes: Max wait time.
-        poll_interval: Seconds between polls.
+        poll_interval: Max seconds between polls.
         on_status: Optional callback(status, elapsed_seconds) called each poll.
+        max_retries: Consecutive failed status checks tolerated before raising.
+        max_backoff: Max seconds to wait between failed status checks.
 
     Returns the workflow instance data dict.
     """
-    start_time = time.time()
-    deadline = start_time + timeout_minutes * 60
+    idle_timeout = client.idle_timeout
+    if idle_timeout is not None:
+        client.idle_timeout = max(idle_timeout, 2 * poll_interval)
+    try:
+        start_time = time.time()
+        deadline = start_time + timeout_minutes * 60
+
+        failures = 0
+        while time.time() < deadline:
+            try:
+                instance = client.call_tool(
+                    "get_workflow_instance_details", {"instance_uuid": uuid}
+                )
+            except _TRANSIENT_ERRORS as exc:
+                if _is_client_error(exc):
+                    raise
+                failures += 1
+                if failures > max_retries:
+                    raise
+                backoff = min(poll_interval * 2 ** (failures - 1), max_backoff)
+                time.sleep(max(0, min(backoff, deadline - time.time())))
+                continue
+            failures = 0
+            status = instance.get("status", "unknown")
+
+            if status in ("completed", "failed", "cancelled", "canceled"):
+                return instance
+
+            if on_status:
+                on_status(status, int(time.time() - start_time))
 
-    while time.time() < deadline:
-        instance = client.call_tool(
-            "get_workflow_instance_details", {"instance_uuid": uuid}
+            _wait_for_update(client, uuid, min(poll_interval, deadline - time.time()))
+
+        raise TimeoutError(
+            f"Workflow {uuid} did not complete within {timeout_minutes} minutes"
         )
-        status = instance.get("status", "unknown")
+    finally:
+        client.idle_timeout = idle_timeout
 
-        if status in ("completed", "failed", "cancelled", "canceled"):
-            return instance
 
-        if on_status:
-            on_status(status, int(time.time() - start_time))
+def log_status_changes(
+    logger: logging.Logger | None = None,
+) -> Callable[[str, int], None]:
+    """Return an ``on_status`` callback that logs only when the status changes.
 
-        time.sleep(poll_interval)
+    Pass it to poll_workflow_completion() so a multi-hour wait logs each
+    transition (e.g. pending → running) once instead of every poll.
+    """
+    logger = logger or log
+    last_status = None
 
-    raise TimeoutError(
-        f"Workflow {uuid} did not complete within {timeout_minutes} minutes"
-    )
+    def on_status(status: str, elapsed: int) -> None:
+        nonlocal last_status
+        if status != last_status:
+            logger.info("  %dm elapsed: status=%s", elapsed // 60, status)
+            last_status = status
+
+    return on_status
+
+
+def load_run_history(path: Path, plate_barcode: str | None = None) -> list[dict]:
+    """Read the per-iteration records saved by append_run_history().
+
+    Records are keyed by their ``"iteration"``: a later line for the same
+    iteration replaces an earlier one, so an iteration can be saved when its
+    workflow is submitted and again when its results arrive. Returns the
+    records in iteration order (empty if there is no file).
+
+    Save each record as soon as its workflow is instantiated. If the last
+    record has no results yet, the agent stopped while that workflow was in
+    flight; poll its UUID again on resume rather than instantiating it a
+    second time, which would dispense into the same column twice.
+
+    :param path: JSON Lines file written by append_run_history().
+    :param plate_barcode: If given, every record must have been saved for this
+        plate; resuming onto a different plate raises RuntimeError.
+    """
+    if not path.exists():
+        return []
+    records: dict[int, dict] = {}
+    with path.open() as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records[record["iteration"]] = record
+
+    if plate_barcode is not None:
+        for record in records.values():
+            if record.get("plate_barcode") != plate_barcode:
+                raise RuntimeError(
+                    f"{path} holds iteration {record['iteration']} for plate "
+                    f"{record.get('plate_barcode')!r}, not {plate_barcode!r}; "
+                    "refusing to resume onto a different plate"
+                )
+    return [records[i] for i in sorted(records)]
+
+
+def append_run_history(path: Path, record: dict) -> None:
+    """Append one record to a JSON Lines run history (see load_run_history())."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _is_client_error(exc: requests.RequestException) -> bool:
+    """True for 4xx responses that retrying the same request won't fix."""
+    response = exc.response if isinstance(exc, requests.HTTPError) else None
+    if response is None:
+        return False
+    status = response.status_code
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+def _wait_for_update(client: McpClient, uuid: str, max_wait: float) -> None:
+    """Block until the server pushes news about ``uuid`` or ``max_wait`` elapses."""
+    if max_wait <= 0:
+        return
+    wait_until = time.time() + max_wait
+    if client.supports_notifications:
+        for message in client.stream_notifications(max_wait=max_wait):
+            # Skip anything but a single JSON-RPC message (e.g. a batch array)
+            params = message.get("params") if isinstance(message, dict) else None
+            if isinstance(params, dict) and uuid in (
+                params.get("uuid"), params.get("instance_uuid")
+            ):
+                return
+
+    remaining = wait_until - time.time()
+    if remaining > 0:
+        time.sleep(remaining)
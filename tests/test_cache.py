@@ -0,0 +1,58 @@
+"""Tests for the on-disk result cache."""
+
+from __future__ import annotations
+
+import pytest
+
+from monomer import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_load_returns_stored_value():
+    cache.store("ns", "key", {"def_id": 7})
+
+    assert cache.load("ns", "key") == {"def_id": 7}
+
+
+def test_load_misses_unknown_key():
+    cache.store("ns", "key", {"def_id": 7})
+
+    assert cache.load("ns", "other") is None
+    assert cache.load("other", "key") is None
+
+
+def test_load_misses_expired_entry(monkeypatch):
+    cache.store("ns", "key", {"def_id": 7}, ttl=60)
+    stored_at = cache.time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: stored_at + 61)
+
+    assert cache.load("ns", "key") is None
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        "{not json",
+        "[1, 2, 3]",
+        '"a string"',
+        "{}",
+        '{"value": {"def_id": 7}}',
+        '{"value": [7], "stored_at": 0, "ttl_s": 1e12}',
+        '{"value": {"def_id": 7}, "stored_at": "now", "ttl_s": 60}',
+    ],
+)
+def test_load_treats_malformed_entry_as_miss(cache_dir, contents):
+    (cache_dir / "ns").mkdir()
+    (cache_dir / "ns" / "key.json").write_text(contents)
+
+    assert cache.load("ns", "key") is None
+
+
+def test_cache_key_separates_parts():
+    assert cache.cache_key("ab", "c") != cache.cache_key("a", "bc")
+    assert cache.cache_key("a", b"b") == cache.cache_key(b"a", "b")
@@ -0,0 +1,44 @@
+"""Tests for OD600 result parsing."""
+
+from __future__ import annotations
+
+import pytest
+
+from monomer.datasets import parse_od_results
+
+
+def _results(column_index: int, rows: str = "ABCDEFGH") -> dict:
+    return {
+        "baseline": {f"{row}{column_index}": 0.1 for row in rows},
+        "endpoint": {
+            f"{row}{column_index}": 0.2 + i / 10 for i, row in enumerate(rows)
+        },
+    }
+
+
+def test_parse_od_results_maps_rows_to_supplements():
+    parsed = parse_od_results(_results(3), column_index=3)
+
+    assert parsed["control_od"] == pytest.approx(0.1)
+    assert parsed["center_od"] == pytest.approx(0.2)
+    assert parsed["perturbed_ods"] == {
+        "Glucose": [pytest.approx(0.3), pytest.approx(0.4)],
+        "NaCl": [pytest.approx(0.5), pytest.approx(0.6)],
+        "MgSO4": [pytest.approx(0.7), pytest.approx(0.8)],
+    }
+    assert parsed["abs_center_od"] == pytest.approx(0.3)
+
+
+@pytest.mark.parametrize("rows", [list("ABCDEF"), list("A"), []])
+def test_parse_od_results_rejects_too_few_rows(rows):
+    with pytest.raises(ValueError, match="needs 8 rows"):
+        parse_od_results(_results(3), column_index=3, rows=rows)
+
+
+def test_parse_od_results_accepts_rows_for_fewer_supplements():
+    parsed = parse_od_results(
+        _results(2, "ABCD"), column_index=2, rows=list("ABCD"),
+        supplement_names=["Glucose"],
+    )
+
+    assert list(parsed["perturbed_ods"]) == ["Glucose"]
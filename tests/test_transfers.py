@@ -0,0 +1,92 @@
+"""Regression tests for transfer array generation and composition helpers."""
+
+from __future__ import annotations
+
+import pytest
+
+from monomer.transfers import (
+    apply_constraints,
+    compute_tip_consumption,
+    generate_transfer_array,
+)
+
+DEFAULT_CENTER = {"Glucose": 20, "NaCl": 10, "MgSO4": 15}
+
+
+def test_generate_transfer_array_default_layout():
+    transfers = generate_transfer_array(DEFAULT_CENTER, column_index=2)
+
+    assert transfers == [
+        # Novel_Bio first, rows A–H
+        ["D1", "A2", 180],
+        ["D1", "B2", 135],
+        ["D1", "C2", 125],
+        ["D1", "D2", 125],
+        ["D1", "E2", 125],
+        ["D1", "F2", 125],
+        ["D1", "G2", 125],
+        ["D1", "H2", 125],
+        # MgSO4
+        ["C1", "B2", 15],
+        ["C1", "C2", 15],
+        ["C1", "D2", 15],
+        ["C1", "E2", 15],
+        ["C1", "F2", 15],
+        ["C1", "G2", 25],
+        ["C1", "H2", 25],
+        # NaCl
+        ["B1", "B2", 10],
+        ["B1", "C2", 10],
+        ["B1", "D2", 10],
+        ["B1", "E2", 20],
+        ["B1", "F2", 20],
+        ["B1", "G2", 10],
+        ["B1", "H2", 10],
+        # Glucose
+        ["A1", "B2", 20],
+        ["A1", "C2", 30],
+        ["A1", "D2", 30],
+        ["A1", "E2", 20],
+        ["A1", "F2", 20],
+        ["A1", "G2", 20],
+        ["A1", "H2", 20],
+    ]
+
+
+def test_generate_transfer_array_fills_every_well():
+    transfers = generate_transfer_array(DEFAULT_CENTER, column_index=5)
+
+    totals: dict[str, int] = {}
+    for _, dest_well, volume in transfers:
+        totals[dest_well] = totals.get(dest_well, 0) + volume
+    assert totals == {f"{row}5": 180 for row in "ABCDEFGH"}
+
+
+def test_apply_constraints_trims_tied_supplements_alternately():
+    # Tied at the maximum: the first supplement is trimmed first, then the
+    # other, one delta at a time until Novel_Bio is back at 90 µL
+    result = apply_constraints({"Glucose": 90, "NaCl": 90})
+
+    assert result == {"Glucose": 40, "NaCl": 50, "MgSO4": 0}
+
+
+def test_apply_constraints_rounds_and_clamps():
+    result = apply_constraints({"Glucose": 0.4, "NaCl": 12.6, "MgSO4": 120})
+
+    assert result == {"Glucose": 0, "NaCl": 13, "MgSO4": 70}
+
+
+@pytest.mark.parametrize(
+    ("volume", "pipette"),
+    [(50, "p50"), (51, "p200"), (200, "p200"), (201, "p1000")],
+)
+def test_compute_tip_consumption_pipette_boundaries(volume, pipette):
+    transfers = [
+        ["A1", "B2", volume],
+        ["D1", "A2", volume],  # Novel_Bio shares one tip per pipette
+        ["D1", "B2", volume],
+    ]
+
+    counts = compute_tip_consumption(transfers)
+
+    assert counts == {"p50": 0, "p200": 0, "p1000": 0, pipette: 2}
@@ -0,0 +1,354 @@
+"""Tests for workflow polling against a fake MCP workcell server."""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from monomer import cache
+from monomer.mcp_client import McpClient
+from monomer.workflows import (
+    append_run_history,
+    load_run_history,
+    poll_workflow_completion,
+    register_workflow_cached,
+)
+
+
+class FakeWorkcell(ThreadingHTTPServer):
+    """Minimal Streamable HTTP MCP server with a controllable SSE stream.
+
+    ``stream_mode`` selects what the GET stream does:
+      "ping"     — send an SSE keep-alive comment every ``ping_interval`` s
+      "truncate" — start a chunk, then drop the connection mid-chunk
+      "batch"    — send a JSON-RPC batch array, then keep-alive comments
+    """
+
+    daemon_threads = True
+
+    def __init__(self, stream_mode: str = "ping", complete_after: float = 1.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.stream_mode = stream_mode
+        self.ping_interval = 0.2
+        self.complete_at = time.monotonic() + complete_after
+        self.sessions: set[str] = set()
+        self.initialize_count = 0
+        self.tool_error_status: int | None = None  # answer tool calls with this
+        self.definitions: dict[int, str] = {}  # registered ID → name
+        self.register_count = 0
+        self.tool_calls: list[str] = []
+        self.stopping = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def restart(self) -> None:
+        """Forget every session, as a restarted workcell would."""
+        self.sessions.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_sse(self, payload: dict, headers: dict | None = None) -> None:
+        body = f"event: message\r\ndata: {json.dumps(payload)}\r\n\r\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        server: FakeWorkcell = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        method = request["method"]
+        self.rpc_id = request.get("id")
+
+        if method == "initialize":
+            server.initialize_count += 1
+            session_id = f"s{server.initialize_count}"
+            server.sessions.add(session_id)
+            self._send_sse(
+                {"jsonrpc": "2.0", "id": request["id"], "result": {}},
+                headers={"mcp-session-id": session_id},
+            )
+            return
+        if self.headers.get("Mcp-Session-Id") not in server.sessions:
+            self._send_empty(404)
+            return
+        if "id" not in request:
+            self._send_empty(202)
+            return
+        if server.tool_error_status is not None:
+            self._send_empty(server.tool_error_status)
+            return
+
+        tool = request["params"]["name"]
+        arguments = request["params"]["arguments"]
+        server.tool_calls.append(tool)
+        if tool == "get_workflow_definition":
+            name = server.definitions.get(arguments["definition_id"])
+            if name is None:
+                self._send_result({"isError": True, "content": [{"text": "Not found"}]})
+                return
+            value = {"id": arguments["definition_id"], "name": name}
+        elif tool == "register_workflow_definition":
+            server.register_count += 1
+            value = {"id": server.register_count}
+            server.definitions[value["id"]] = arguments["name"]
+        elif tool == "create_workflow_definition_file":
+            value = {}
+        else:
+            done = time.monotonic() >= server.complete_at
+            value = {"uuid": "wf-1", "status": "completed" if done else "running"}
+        self._send_result({"structuredContent": {"result": value}})
+
+    def _send_result(self, result: dict) -> None:
+        self._send_sse({"jsonrpc": "2.0", "id": self.rpc_id, "result": result})
+
+    def do_GET(self) -> None:
+        server: FakeWorkcell = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        if server.stream_mode == "truncate":
+            # Announce a 32-byte chunk, send part of it, then hang up
+            self.wfile.write(b"20\r\n: pi")
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+
+        ping = b": ping\r\n\r\n"
+        try:
+            if server.stream_mode == "batch":
+                batch = b'data: [{"jsonrpc": "2.0", "method": "ping"}]\r\n\r\n'
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(batch), batch))
+            while not server.stopping.is_set():
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(ping), ping))
+                self.wfile.flush()
+                time.sleep(server.ping_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_DELETE(self) -> None:
+        self.server.sessions.discard(self.headers.get("Mcp-Session-Id"))
+        self._send_empty(200)
+
+
+@pytest.fixture
+def workcell(request):
+    server = FakeWorkcell(**getattr(request, "param", {}))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.stopping.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_close_does_not_retry_against_unreachable_workcell():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # closed again before the client uses it
+    client = McpClient(f"http://127.0.0.1:{port}")
+    client.session_id = "s1"
+    client._owns_session = True
+
+    start = time.monotonic()
+    client.close()
+
+    assert time.monotonic() - start < 1
+    assert client.session_id is None
+
+
+def test_poll_is_not_held_open_by_keepalive_pings(workcell):
+    start = time.monotonic()
+    with McpClient(workcell.url) as client:
+        result = poll_workflow_completion(
+            client, "wf-1", timeout_minutes=0.5, poll_interval=2
+        )
+
+    assert result["status"] == "completed"
+    assert time.monotonic() - start < 6
+
+
+def test_poll_raises_timeout_at_deadline_despite_pings(workcell):
+    workcell.complete_at = float("inf")
+    start = time.monotonic()
+    with McpClient(workcell.url) as client:
+        with pytest.raises(TimeoutError):
+            poll_workflow_completion(
+                client, "wf-1", timeout_minutes=0.05, poll_interval=2
+            )
+
+    assert time.monotonic() - start < 8
+
+
+@pytest.mark.parametrize("workcell", [{"stream_mode": "truncate"}], indirect=True)
+def test_poll_falls_back_to_sleeping_when_stream_breaks(workcell):
+    with McpClient(workcell.url) as client:
+        result = poll_workflow_completion(
+            client, "wf-1", timeout_minutes=0.5, poll_interval=1
+        )
+
+    assert result["status"] == "completed"
+
+
+@pytest.mark.parametrize("workcell", [{"stream_mode": "batch"}], indirect=True)
+def test_poll_ignores_non_object_notifications(workcell):
+    with McpClient(workcell.url) as client:
+        result = poll_workflow_completion(
+            client, "wf-1", timeout_minutes=0.5, poll_interval=1
+        )
+
+    assert result["status"] == "completed"
+
+
+def test_poll_renews_session_after_workcell_restart(workcell):
+    workcell.complete_at = time.monotonic() + 1.5
+    with McpClient(workcell.url) as client:
+        threading.Timer(0.5, workcell.restart).start()
+        result = poll_workflow_completion(
+            client, "wf-1", timeout_minutes=0.5, poll_interval=1
+        )
+        assert client.session_id == "s2"
+
+    assert result["status"] == "completed"
+
+
+def test_poll_raises_client_errors_without_retrying(workcell):
+    workcell.tool_error_status = 403
+    start = time.monotonic()
+    with McpClient(workcell.url) as client:
+        with pytest.raises(requests.HTTPError):
+            poll_workflow_completion(
+                client, "wf-1", timeout_minutes=0.5, poll_interval=2
+            )
+
+    assert time.monotonic() - start < 1
+
+
+def test_poll_raises_invalid_url_without_retrying():
+    start = time.monotonic()
+    with McpClient("nope://workcell") as client:
+        with pytest.raises(requests.exceptions.InvalidSchema):
+            poll_workflow_completion(
+                client, "wf-1", timeout_minutes=0.5, poll_interval=2
+            )
+
+    assert time.monotonic() - start < 1
+
+
+def test_poll_keeps_session_when_interval_exceeds_idle_timeout(workcell):
+    workcell.complete_at = time.monotonic() + 2.5
+    with McpClient(workcell.url, idle_timeout=1) as client:
+        result = poll_workflow_completion(
+            client, "wf-1", timeout_minutes=0.5, poll_interval=2
+        )
+        assert client.idle_timeout == 1
+
+    assert result["status"] == "completed"
+    assert workcell.initialize_count == 1
+
+
+def test_run_history_keeps_latest_record_per_iteration(tmp_path):
+    path = tmp_path / "runs" / "history.jsonl"
+    append_run_history(path, {"iteration": 1, "plate_barcode": "P1", "uuid": "a"})
+    append_run_history(
+        path, {"iteration": 1, "plate_barcode": "P1", "uuid": "a", "od": {}}
+    )
+    append_run_history(path, {"iteration": 2, "plate_barcode": "P1", "uuid": "b"})
+
+    history = load_run_history(path, "P1")
+
+    assert [record["iteration"] for record in history] == [1, 2]
+    assert "od" in history[0]
+    assert "od" not in history[1]
+
+
+def test_run_history_refuses_another_plate(tmp_path):
+    path = tmp_path / "history.jsonl"
+    append_run_history(path, {"iteration": 1, "plate_barcode": "P1", "uuid": "a"})
+
+    with pytest.raises(RuntimeError):
+        load_run_history(path, "P2")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "workflow_definition_template.py"
+    path.write_text("def build_definition(): ...\n")
+    return path
+
+
+def test_cached_registration_is_checked_on_the_workcell(workcell, cache_dir, template):
+    with McpClient(workcell.url) as client:
+        first = register_workflow_cached(client, template, name="Agent")
+        workcell.tool_calls.clear()
+        second = register_workflow_cached(client, template, name="Agent")
+
+    assert second == first
+    assert workcell.tool_calls == ["get_workflow_definition"]
+
+
+def test_cached_registration_renewed_when_definition_is_gone(
+    workcell, cache_dir, template
+):
+    with McpClient(workcell.url) as client:
+        first = register_workflow_cached(client, template, name="Agent")
+        workcell.definitions.clear()
+        second = register_workflow_cached(client, template, name="Agent")
+        third = register_workflow_cached(client, template, name="Agent")
+
+    assert second != first
+    assert third == second
+
+
+def test_refresh_registers_again(workcell, cache_dir, template):
+    with McpClient(workcell.url) as client:
+        first = register_workflow_cached(client, template, name="Agent")
+        workcell.tool_calls.clear()
+        second = register_workflow_cached(client, template, name="Agent", refresh=True)
+
+    assert second != first
+    assert "get_workflow_definition" not in workcell.tool_calls
+
+
+def test_cache_entry_without_definition_id_registers_again(
+    workcell, cache_dir, template
+):
+    key = cache.cache_key(workcell.url, "Agent", template.read_bytes())
+    cache.store("workflow_registry", key, {"id": 1})
+
+    with McpClient(workcell.url) as client:
+        def_id = register_workflow_cached(client, template, name="Agent")
+
+    assert def_id == 1
+    assert workcell.tool_calls == [
+        "create_workflow_definition_file", "register_workflow_definition"
+    ]
@@ -11,6 +11,11 @@ Runs a full multi-iteration experiment:
 
 Usage:
     python examples/basic_agent.py --plate GD-R1-20260314 --iterations 5
+
+Each iteration is saved to runs/basic_agent_history.jsonl when its workflow is
+submitted and again when its results arrive. Pass --resume to continue a run
+on the same plate: a workflow submitted before the restart is polled again
+rather than dispensed a second time.
 """
 
 from __future__ import annotations
@@ -18,6 +23,7 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import logging.handlers
 from pathlib import Path
 
 from monomer.datasets import fetch_absorbance_results, parse_od_results
@@ -29,155 +35,249 @@ from monomer.transfers import (
     generate_transfer_array,
 )
 from monomer.workflows import (
+    DAEMON_POLL_INTERVAL,
+    append_run_history,
     instantiate_workflow,
+    load_run_history,
+    log_status_changes,
     poll_workflow_completion,
-    register_workflow,
+    register_workflow_cached,
 )
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 log = logging.getLogger(__name__)
 
 # ── Paths ────────────────────────────────────────────────────────────────────
 
 WORKFLOW_TEMPLATE = Path(__file__).parent / "workflow_definition_template.py"
+HISTORY_LOG = Path("runs") / "basic_agent_history.jsonl"
+
+# ── Plate layout ─────────────────────────────────────────────────────────────
+
+# Wells of each experiment-plate column (index = column - 1). Tuples, so an
+# in-place edit of one iteration's wells can't corrupt later columns.
+DEST_WELLS_BY_COLUMN = tuple(tuple(f"{r}{c}" for r in ROWS) for c in range(1, 13))
+# Warm seed wells in column 1, one per iteration (index = iteration - 1)
+SEED_WELLS = tuple(f"{r}1" for r in ROWS)
 
 # ── Agent parameters ─────────────────────────────────────────────────────────
 
-LEARNING_RATE = 5    # µL to adjust per unit gradient
+LEARNING_RATE = 5    # µL to adjust per unit gradient (first iteration)
+LR_DECAY = 0.8       # learning rate shrinks by this factor each iteration
+LR_MIN = 1           # floor so late iterations still move
+MOMENTUM = 0.9       # fraction of past gradients carried into each step
+CLIP_UL = 20         # max µL any supplement moves in one iteration
 DELTA_UL = 10        # perturbation size for gradient estimation
 
 
+def learning_rate(iteration: int) -> float:
+    """Exponentially decaying step size: explore early, refine later.
+
+    Each iteration costs 60–90 min of wet-lab time, so large early steps
+    cover ground quickly and smaller later steps avoid overshooting.
+    """
+    return max(LR_MIN, LEARNING_RATE * LR_DECAY ** (iteration - 1))
+
+
+def gradient_step(
+    center: dict[str, int],
+    parsed: dict,
+    velocity: dict[str, float],
+    lr: float,
+) -> tuple[dict[str, int], dict[str, float], dict[str, float]]:
+    """Compute one momentum gradient step for every supplement.
+
+    Pure function: returns ``(new_center, new_velocity, gradients)`` and leaves
+    its arguments untouched. ``new_center`` is not yet constrained — pass it
+    through apply_constraints() before generating transfers.
+    """
+    center_od = parsed["center_od"]
+    perturbed_ods = parsed["perturbed_ods"]
+    new_center = dict(center)
+    new_velocity = {}
+    gradients = {}
+    for supp in SUPPLEMENT_NAMES:
+        r1, r2 = perturbed_ods[supp]
+        gradients[supp] = (r1 + r2) / 2 - center_od
+        new_velocity[supp] = MOMENTUM * velocity[supp] + gradients[supp]
+        step = max(-CLIP_UL, min(CLIP_UL, lr * new_velocity[supp]))
+        new_center[supp] = center[supp] + int(step)
+    return new_center, new_velocity, gradients
+
+
 def run_agent(
     plate_barcode: str,
     n_iterations: int = 5,
     workcell_url: str = "http://192.168.68.55:8080",
+    poll_interval: int = DAEMON_POLL_INTERVAL,
+    resume: bool = False,
+    refresh_registration: bool = False,
 ):
-    client = McpClient(workcell_url)
-
-    # ── Register workflow definition ONCE ────────────────────────────────────
-    # The same definition is reused for every iteration; each instantiation
-    # passes its own transfer_array, dest_wells, etc. as inputs.
-    log.info("Registering workflow definition...")
-    def_id = register_workflow(
-        client,
-        WORKFLOW_TEMPLATE,
-        name=f"Hackathon GD Agent — {plate_barcode}",
-    )
-    log.info("Registered workflow definition ID: %d", def_id)
-
-    # ── Starting composition ─────────────────────────────────────────────────
-    center = apply_constraints({"Glucose": 20, "NaCl": 10, "MgSO4": 15})
-    log.info("Starting composition: %s", center)
-
-    # Track wells used so far for cumulative OD600 monitoring
-    monitoring_wells: list[str] = []
-    history = []
-
-    for iteration in range(1, n_iterations + 1):
-        log.info("=== Iteration %d / %d ===", iteration, n_iterations)
-        log.info("Center: %s", center)
-
-        # Column 1 is reserved for seed wells; experiments start at column 2.
-        column_index = iteration + 1
-        if column_index > 12:
-            log.warning("Plate full after iteration %d — stopping", iteration - 1)
-            break
-
-        # Seed well advances one row per iteration: A1, B1, C1, ...
-        seed_well = f"{ROWS[iteration - 1]}1"
-        next_seed_well = f"{ROWS[iteration]}1" if iteration < len(ROWS) else ""
-
-        # Destination wells for this iteration (one full column)
-        dest_wells = [f"{r}{column_index}" for r in ROWS]
-
-        # Cumulative monitoring: all wells used so far + this iteration's wells
-        monitoring_wells = monitoring_wells + dest_wells
-
-        # ── Step 1: Generate transfer array ──────────────────────────────────
-        transfers = generate_transfer_array(
-            center, column_index=column_index, delta=DELTA_UL
-        )
-        log.info(
-            "Generated %d transfers → column %d (seed=%s, next=%s)",
-            len(transfers), column_index, seed_well, next_seed_well or "none",
-        )
-
-        # ── Step 2: Instantiate the workflow ─────────────────────────────────
-        uuid = instantiate_workflow(
+    with McpClient(workcell_url) as client:
+        # ── Register workflow definition ONCE ────────────────────────────────
+        # The same definition is reused for every iteration; each instantiation
+        # passes its own transfer_array, dest_wells, etc. as inputs. The ID is
+        # cached on disk, so restarting with an unchanged template skips this.
+        log.info("Registering workflow definition...")
+        def_id = register_workflow_cached(
             client,
-            definition_id=def_id,
-            plate_barcode=plate_barcode,
-            extra_inputs={
-                "transfer_array":    json.dumps(transfers),
-                "dest_wells":        json.dumps(dest_wells),
-                "monitoring_wells":  json.dumps(monitoring_wells),
-                "seed_well":         seed_well,
-                "next_seed_well":    next_seed_well,
-            },
-            reason=(
-                f"GD iteration {iteration}/{n_iterations}, "
-                f"column={column_index}, center={json.dumps(center)}"
-            ),
+            WORKFLOW_TEMPLATE,
+            name=f"Hackathon GD Agent — {plate_barcode}",
+            refresh=refresh_registration,
         )
-        log.info("Instantiated workflow: %s (pending operator approval)", uuid)
-
-        # ── Step 3: Wait for completion ───────────────────────────────────────
-        log.info("Polling for completion — typical runtime 60–90 min...")
-        result = poll_workflow_completion(
-            client,
-            uuid,
-            timeout_minutes=180,
-            on_status=lambda s, t: log.info("  %dm elapsed: status=%s", t // 60, s),
-        )
-        log.info("Workflow completed: status=%s", result.get("status"))
+        log.info("Registered workflow definition ID: %d", def_id)
+
+        # ── Starting composition ─────────────────────────────────────────────
+        center = apply_constraints({"Glucose": 20, "NaCl": 10, "MgSO4": 15})
+
+        # Track wells used so far for cumulative OD600 monitoring
+        monitoring_wells: list[str] = []
+        history = load_run_history(HISTORY_LOG, plate_barcode) if resume else []
+        # A last record without results is re-polled below, not re-instantiated
+        pending = history.pop() if history and "parsed" not in history[-1] else None
+
+        # Momentum: running average of gradients, so one noisy OD600 read
+        # can't swing the composition on its own
+        velocity = {supp: 0.0 for supp in SUPPLEMENT_NAMES}
+
+        if history:
+            # Pick up where the saved run stopped: same center, momentum and
+            # monitored wells, next column on the plate
+            last = history[-1]
+            center = last["next_center"]
+            velocity = last["velocity"]
+            for record in history:
+                monitoring_wells.extend(DEST_WELLS_BY_COLUMN[record["column"] - 1])
+            log.info("Resuming after iteration %d", last["iteration"])
+        HISTORY_LOG.parent.mkdir(exist_ok=True)
+        if not resume:
+            HISTORY_LOG.write_text("")
+        log.info("Starting composition: %s", center)
+
+        first_iteration = len(history) + 1
+        for iteration in range(first_iteration, n_iterations + 1):
+            log.info("=== Iteration %d / %d ===", iteration, n_iterations)
+            # Serialised once and shared by the log line and the approval reason
+            center_json = json.dumps(center)
+            log.info("Center: %s", center_json)
+
+            # Column 1 is reserved for seed wells; experiments start at column 2.
+            column_index = iteration + 1
+            if column_index > 12:
+                log.warning("Plate full after iteration %d — stopping", iteration - 1)
+                break
+
+            # Seed well advances one row per iteration: A1, B1, C1, ...
+            seed_well = SEED_WELLS[iteration - 1]
+            next_seed_well = (
+                SEED_WELLS[iteration] if iteration < len(SEED_WELLS) else ""
+            )
 
-        # ── Step 4: Fetch OD600 results ───────────────────────────────────────
-        raw = fetch_absorbance_results(client, plate_barcode, column_index=column_index)
-        parsed = parse_od_results(raw, column_index=column_index)
+            # Destination wells for this iteration (one full column)
+            dest_wells = DEST_WELLS_BY_COLUMN[column_index - 1]
+
+            # Cumulative monitoring: all wells used so far + this iteration's wells
+            monitoring_wells.extend(dest_wells)
+
+            if pending is None:
+                # ── Step 1: Generate transfer array ──────────────────────────
+                transfers = generate_transfer_array(
+                    center, column_index=column_index, delta=DELTA_UL
+                )
+                log.info(
+                    "Generated %d transfers → column %d (seed=%s, next=%s)",
+                    len(transfers), column_index,
+                    seed_well, next_seed_well or "none",
+                )
+
+                # ── Step 2: Instantiate the workflow ─────────────────────────
+                extra_inputs = {
+                    "transfer_array":    json.dumps(transfers),
+                    "dest_wells":        json.dumps(dest_wells),
+                    "monitoring_wells":  json.dumps(monitoring_wells),
+                    "seed_well":         seed_well,
+                    "next_seed_well":    next_seed_well,
+                }
+                reason = (
+                    f"GD iteration {iteration}/{n_iterations}, "
+                    f"column={column_index}, center={center_json}"
+                )
+                uuid = instantiate_workflow(
+                    client, def_id, plate_barcode, extra_inputs, reason
+                )
+                log.info(
+                    "Instantiated workflow: %s (pending operator approval)", uuid
+                )
+                record = {
+                    "iteration":      iteration,
+                    "column":         column_index,
+                    "plate_barcode":  plate_barcode,
+                    "seed_well":      seed_well,
+                    "center":         dict(center),
+                    "uuid":           uuid,
+                }
+                append_run_history(HISTORY_LOG, record)
+            else:
+                record, pending = pending, None
+                uuid = record["uuid"]
+                log.info("Resuming workflow %s submitted before the restart", uuid)
+
+            # ── Step 3: Wait for completion ───────────────────────────────────
+            log.info("Polling for completion — typical runtime 60–90 min...")
+            result = poll_workflow_completion(
+                client,
+                uuid,
+                timeout_minutes=180,
+                poll_interval=poll_interval,
+                on_status=log_status_changes(log),
+            )
+            log.info("Workflow completed: status=%s", result.get("status"))
 
-        log.info(
-            "Results — control: %.3f | center: %.3f",
-            parsed["control_od"],
-            parsed["center_od"],
-        )
-        for supp, (r1, r2) in parsed["perturbed_ods"].items():
-            log.info(
-                "  %s: %.3f, %.3f (avg %.3f)", supp, r1, r2, (r1 + r2) / 2
+            # ── Step 4: Fetch OD600 results ───────────────────────────────────
+            raw = fetch_absorbance_results(
+                client, plate_barcode, column_index=column_index
             )
+            parsed = parse_od_results(raw, column_index=column_index)
 
-        history.append({
-            "iteration":  iteration,
-            "column":     column_index,
-            "seed_well":  seed_well,
-            "center":     dict(center),
-            "parsed":     parsed,
-        })
-
-        # ── Step 5: Gradient update ───────────────────────────────────────────
-        new_center = dict(center)
-        for supp in SUPPLEMENT_NAMES:
-            r1, r2 = parsed["perturbed_ods"][supp]
-            avg_perturbed = (r1 + r2) / 2
-            gradient = avg_perturbed - parsed["center_od"]
-            adjustment = int(LEARNING_RATE * gradient)
-            new_center[supp] = center[supp] + adjustment
             log.info(
-                "  Gradient %s: %.3f → adjust %+d µL", supp, gradient, adjustment
+                "Results — control: %.3f | center: %.3f",
+                parsed["control_od"],
+                parsed["center_od"],
             )
+            for supp, (r1, r2) in parsed["perturbed_ods"].items():
+                log.info(
+                    "  %s: %.3f, %.3f (avg %.3f)", supp, r1, r2, (r1 + r2) / 2
+                )
+
+            record["parsed"] = parsed
+            history.append(record)
+
+            # ── Step 5: Gradient update ───────────────────────────────────────
+            lr = learning_rate(iteration)
+            log.info("Learning rate: %.2f", lr)
+            new_center, velocity, gradients = gradient_step(
+                center, parsed, velocity, lr
+            )
+            for supp, gradient in gradients.items():
+                log.info(
+                    "  Gradient %s: %.3f → adjust %+d µL",
+                    supp, gradient, new_center[supp] - center[supp],
+                )
+            center = apply_constraints(new_center)
+            log.info("Updated center: %s", center)
 
-        center = apply_constraints(new_center)
-        log.info("Updated center: %s", center)
+            record["velocity"] = dict(velocity)
+            record["next_center"] = dict(center)
+            append_run_history(HISTORY_LOG, record)
 
-    log.info("=== Agent finished after %d iterations ===", len(history))
-    log.info("Final center composition: %s", center)
+        log.info("=== Agent finished after %d iterations ===", len(history))
+        log.info("Final center composition: %s", center)
 
-    # Save run history
-    output_dir = Path("runs")
-    output_dir.mkdir(exist_ok=True)
-    (output_dir / "history.json").write_text(json.dumps(history, indent=2))
-    log.info("History saved to runs/history.json")
+        # Save run history
+        history_json = HISTORY_LOG.with_suffix(".json")
+        history_json.write_text(json.dumps(history, indent=2))
+        log.info("History saved to %s", history_json)
 
-    return center, history
+        return center, history
 
 
 if __name__ == "__main__":
@@ -195,10 +295,42 @@ if __name__ == "__main__":
         default="http://192.168.68.55:8080",
         help="Workcell base URL",
     )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=DAEMON_POLL_INTERVAL,
+        help="Max seconds between workflow status checks",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the run saved in runs/basic_agent_history.jsonl",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Register the workflow definition again instead of reusing a cached ID",
+    )
     args = parser.parse_args()
 
+    # Console plus a size-capped log file, so a multi-hour run leaves a record
+    Path("runs").mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.handlers.RotatingFileHandler(
+                "runs/basic_agent.log", maxBytes=10_000_000, backupCount=3
+            ),
+        ],
+    )
+
     run_agent(
         plate_barcode=args.plate,
         n_iterations=args.iterations,
         workcell_url=args.workcell,
+        poll_interval=args.poll_interval,
+        resume=args.resume,
+        refresh_registration=args.no_cache,
     )
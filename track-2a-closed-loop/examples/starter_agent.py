@@ -33,6 +33,11 @@ Usage:
         --reagent-name "Team Alpha Stock Plate" \\
         --cell-stock CELLS-20260314 \\
         --iterations 5
+
+Each iteration is saved to runs/starter_agent_history.jsonl when its workflow is
+submitted and again when its results arrive. Add --resume to continue a run on
+the same plate (e.g. after a crash) instead of starting over at column 2; a
+workflow submitted before the restart is polled again, not dispensed twice.
 """
 
 from __future__ import annotations
@@ -40,22 +45,32 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import logging.handlers
 from pathlib import Path
 
 from monomer.datasets import fetch_absorbance_results
 from monomer.mcp_client import McpClient
 from monomer.transfers import ROWS
 from monomer.workflows import (
+    DAEMON_POLL_INTERVAL,
+    append_run_history,
     instantiate_workflow,
+    load_run_history,
+    log_status_changes,
     poll_workflow_completion,
-    register_workflow,
+    register_workflow_cached,
 )
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 log = logging.getLogger(__name__)
 
 WORKFLOW_TEMPLATE = Path(__file__).parent / "workflow_definition_template.py"
 
+# Wells of each experiment-plate column (index = column - 1). Tuples, so your
+# strategy can't edit the shared table by accident — copy with list() first.
+DEST_WELLS_BY_COLUMN = tuple(
+    tuple(f"{row}{col}" for row in ROWS) for col in range(1, 13)
+)
+
 
 # ── CUSTOMIZE 1: Your stock plate layout ──────────────────────────────────────
 #
@@ -121,7 +136,7 @@ def design_next_iteration(
     #        "volume": 20, "new_tip": "once", "blow_out": True},
     #   ]
 
-    dest_wells = [f"{row}{column_index}" for row in ROWS]
+    dest_wells = DEST_WELLS_BY_COLUMN[column_index - 1]
     return [
         {"src_plate": "reagent", "src_well": BASE_MEDIA_WELL,
          "dst_plate": "experiment", "dst_well": well,
@@ -138,81 +153,116 @@ def run_agent(
     cell_stock_barcode: str,
     n_iterations: int = 5,
     workcell_url: str = "http://192.168.68.55:8080",
+    poll_interval: int = DAEMON_POLL_INTERVAL,
+    resume: bool = False,
+    refresh_registration: bool = False,
 ) -> None:
-    client = McpClient(workcell_url)
-
-    log.info("Registering workflow definition...")
-    def_id = register_workflow(
-        client,
-        WORKFLOW_TEMPLATE,
-        name=f"Starter Agent — {plate_barcode}",
-    )
-    log.info("Definition ID: %d", def_id)
-
-    history: list[dict] = []
-    monitoring_wells: list[str] = []
-
-    for iteration in range(1, n_iterations + 1):
-        log.info("=== Iteration %d / %d ===", iteration, n_iterations)
-
-        # Experiments start at column 2; column 1 is reserved for seed wells
-        column_index = iteration + 1
-        if column_index > 12:
-            log.warning("Plate full — stopping after iteration %d", iteration - 1)
-            break
-
-        dest_wells       = [f"{row}{column_index}" for row in ROWS]
-        monitoring_wells = monitoring_wells + dest_wells
-
-        # ── Design ───────────────────────────────────────────────────────────
-        transfers = design_next_iteration(iteration, column_index, history)
-        log.info("%d transfers → column %d (%s–%s)", len(transfers), column_index,
-                 dest_wells[0], dest_wells[-1])
-
-        # ── Act ───────────────────────────────────────────────────────────────
-        uuid = instantiate_workflow(
+    with McpClient(workcell_url) as client:
+        log.info("Registering workflow definition...")
+        def_id = register_workflow_cached(
             client,
-            definition_id=def_id,
-            plate_barcode=plate_barcode,
-            extra_inputs={
-                "transfer_array":                json.dumps(transfers),
-                "monitoring_wells":              json.dumps(monitoring_wells),
-                "reagent_name":                  reagent_name,
-                "cell_culture_stock_plate_barcode": cell_stock_barcode,
-            },
-            reason=f"Iteration {iteration}/{n_iterations}",
+            WORKFLOW_TEMPLATE,
+            name=f"Starter Agent — {plate_barcode}",
+            refresh=refresh_registration,
         )
-        log.info("Workflow %s submitted — awaiting operator approval...", uuid)
-
-        # ── Wait ──────────────────────────────────────────────────────────────
-        poll_workflow_completion(
-            client,
-            uuid,
-            timeout_minutes=180,
-            on_status=lambda s, t: log.info("  %dm elapsed: %s", t // 60, s),
-        )
-
-        # ── Observe ───────────────────────────────────────────────────────────
-        raw = fetch_absorbance_results(client, plate_barcode, column_index=column_index)
-        od = {
-            well: raw["endpoint"].get(well, 0.0) - raw["baseline"].get(well, 0.0)
-            for well in dest_wells
-        }
-        log.info("Delta OD600: %s", {w: f"{v:.3f}" for w, v in od.items()})
-
-        history.append({
-            "iteration":    iteration,
-            "column_index": column_index,
-            "transfers":    transfers,
-            "od":           od,
-        })
-
-        # Save after each iteration — safe to crash and restart
-        Path("runs").mkdir(exist_ok=True)
-        Path("runs/history.json").write_text(json.dumps(history, indent=2))
-        log.info("History saved → runs/history.json")
-
-    log.info("Done. %d iteration(s) complete.", len(history))
+        log.info("Definition ID: %d", def_id)
+
+        # JSON lines per iteration, appended on submission and on results
+        output_dir = Path("runs")
+        output_dir.mkdir(exist_ok=True)
+        history_log = output_dir / "starter_agent_history.jsonl"
+
+        history: list[dict] = []
+        if resume:
+            history = load_run_history(history_log, plate_barcode)
+        else:
+            history_log.write_text("")
+        pending = history.pop() if history and "od" not in history[-1] else None
+
+        monitoring_wells: list[str] = []
+        if history:
+            for record in history:
+                column = record["column_index"]
+                monitoring_wells.extend(DEST_WELLS_BY_COLUMN[column - 1])
+            log.info("Resuming after iteration %d", history[-1]["iteration"])
+
+        for iteration in range(len(history) + 1, n_iterations + 1):
+            log.info("=== Iteration %d / %d ===", iteration, n_iterations)
+
+            # Experiments start at column 2; column 1 is reserved for seed wells
+            column_index = iteration + 1
+            if column_index > 12:
+                log.warning("Plate full — stopping after iteration %d", iteration - 1)
+                break
+
+            dest_wells = DEST_WELLS_BY_COLUMN[column_index - 1]
+            monitoring_wells.extend(dest_wells)
+
+            if pending is None:
+                # ── Design ───────────────────────────────────────────────────
+                transfers = design_next_iteration(iteration, column_index, history)
+                log.info("%d transfers → column %d (%s–%s)", len(transfers),
+                         column_index, dest_wells[0], dest_wells[-1])
+
+                # ── Act ───────────────────────────────────────────────────────
+                extra_inputs = {
+                    "transfer_array":                json.dumps(transfers),
+                    "monitoring_wells":              json.dumps(monitoring_wells),
+                    "reagent_name":                  reagent_name,
+                    "cell_culture_stock_plate_barcode": cell_stock_barcode,
+                }
+                reason = f"Iteration {iteration}/{n_iterations}"
+                uuid = instantiate_workflow(
+                    client, def_id, plate_barcode, extra_inputs, reason
+                )
+                log.info(
+                    "Workflow %s submitted — awaiting operator approval...", uuid
+                )
+                record = {
+                    "iteration":     iteration,
+                    "column_index":  column_index,
+                    "plate_barcode": plate_barcode,
+                    "transfers":     transfers,
+                    "uuid":          uuid,
+                }
+                append_run_history(history_log, record)
+            else:
+                record, pending = pending, None
+                uuid = record["uuid"]
+                log.info("Resuming workflow %s submitted before the restart", uuid)
+
+            # ── Wait ──────────────────────────────────────────────────────────
+            poll_workflow_completion(
+                client,
+                uuid,
+                timeout_minutes=180,
+                poll_interval=poll_interval,
+                on_status=log_status_changes(log),
+            )
+
+            # ── Observe ───────────────────────────────────────────────────────
+            raw = fetch_absorbance_results(
+                client, plate_barcode, column_index=column_index
+            )
+            od = {
+                well: raw["endpoint"].get(well, 0.0) - raw["baseline"].get(well, 0.0)
+                for well in dest_wells
+            }
+            log.info("Delta OD600: %s", {w: f"{v:.3f}" for w, v in od.items()})
+
+            record["od"] = od
+            history.append(record)
+
+            # Save after each iteration — safe to crash and restart. Only the new
+            # record is written, not the whole history again.
+            append_run_history(history_log, record)
+            log.info("History saved → %s", history_log)
+
+        # Full history as one JSON array, streamed to disk in a single pass
+        history_json = history_log.with_suffix(".json")
+        with history_json.open("w") as f:
+            json.dump(history, f, indent=2)
+        log.info("Done. %d iteration(s) complete → %s", len(history), history_json)
 
 
 if __name__ == "__main__":
@@ -227,12 +277,34 @@ if __name__ == "__main__":
                         help="Number of iterations to run (default 5)")
     parser.add_argument("--workcell",     default="http://192.168.68.55:8080",
                         help="Autoplat MCP base URL")
+    parser.add_argument("--poll-interval", type=int, default=DAEMON_POLL_INTERVAL,
+                        help="Max seconds between workflow status checks (default 30)")
+    parser.add_argument("--resume",       action="store_true",
+                        help="Continue the run in runs/starter_agent_history.jsonl")
+    parser.add_argument("--no-cache",     action="store_true",
+                        help="Re-register the workflow definition (ignore cached ID)")
     args = parser.parse_args()
 
+    # Console plus a size-capped log file, so a multi-hour run leaves a record
+    Path("runs").mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.handlers.RotatingFileHandler(
+                "runs/starter_agent.log", maxBytes=10_000_000, backupCount=3
+            ),
+        ],
+    )
+
     run_agent(
         plate_barcode=args.plate,
         reagent_name=args.reagent_name,
         cell_stock_barcode=args.cell_stock,
         n_iterations=args.iterations,
         workcell_url=args.workcell,
+        poll_interval=args.poll_interval,
+        resume=args.resume,
+        refresh_registration=args.no_cache,
     )
@@ -81,8 +81,6 @@ any well with a reading has already been inoculated.
 
 from __future__ import annotations
 
-import json
-
 from src.platform.core_domain.units import Time
 from src.workflows.workflow_definition_dsl.workflow_definition_descriptor import (
     MoreThanConstraint,
@@ -90,9 +88,28 @@ from src.workflows.workflow_definition_dsl.workflow_definition_descriptor import
     WorkflowDefinitionDescriptor,
 )
 
+# orjson is faster but may not be installed in the workcell image
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+else:
+    import json
+
+    _loads = json.loads
+
 # Hard cap on reagent transfer steps per iteration
 _MAX_TRANSFERS = 40
 
+# Plate names accepted for src_plate / dst_plate
+_VALID_PLATES = frozenset({"reagent", "experiment", "cell_culture_stock"})
+
+# Exact JSON number types for volume (bool is excluded: `true` is not 1 µL)
+_NUMBER_TYPES = (int, float)
+
 
 def _validate(transfers: list[dict], monitoring_well_list: list[str]) -> None:
     """Validate iteration parameters before the workflow is queued.
@@ -111,25 +128,24 @@ def _validate(transfers: list[dict], monitoring_well_list: list[str]) -> None:
         "monitoring_wells is empty. Include the dest wells from this iteration."
     )
 
-    valid_plates = {"reagent", "experiment", "cell_culture_stock"}
     for i, t in enumerate(transfers):
         assert isinstance(t, dict), (
             f"Transfer [{i}] is not a dict. "
             "transfer_array must be a JSON list of dicts — see REAGENT_PLATE.md."
         )
         vol = t.get("volume", 0)
-        assert isinstance(vol, (int, float)) and vol > 0, (
+        assert type(vol) in _NUMBER_TYPES and vol > 0, (
             f"Transfer [{i}]: volume must be a positive number, got {vol!r}."
         )
         src = t.get("src_plate", "")
         dst = t.get("dst_plate", "")
-        assert src in valid_plates, (
+        assert src in _VALID_PLATES, (
             f"Transfer [{i}]: unknown src_plate='{src}'. "
-            f"Must be one of: {sorted(valid_plates)}."
+            f"Must be one of: {sorted(_VALID_PLATES)}."
         )
-        assert dst in valid_plates, (
+        assert dst in _VALID_PLATES, (
             f"Transfer [{i}]: unknown dst_plate='{dst}'. "
-            f"Must be one of: {sorted(valid_plates)}."
+            f"Must be one of: {sorted(_VALID_PLATES)}."
         )
 
 
@@ -174,8 +190,8 @@ def build_definition(
     :param monitoring_interval_minutes: Minutes between OD600 reads (min 5).
     """
     # ── Parse JSON inputs ────────────────────────────────────────────────────
-    transfers: list[dict] = json.loads(transfer_array) if transfer_array else []
-    monitoring_well_list: list[str] = json.loads(monitoring_wells)
+    transfers: list[dict] = _loads(transfer_array) if transfer_array else []
+    monitoring_well_list: list[str] = _loads(monitoring_wells)
 
     # ── Validate ─────────────────────────────────────────────────────────────
     _validate(transfers, monitoring_well_list)
@@ -191,14 +207,15 @@ def build_definition(
     # Phase 1: Liquid handling
     # Executes the transfer array on the Opentrons Flex. Supports any combination
     # of reagent → experiment, cell_culture_stock → experiment, or intra-plate
-    # transfers. Only plates referenced in the array will be unlid.
+    # transfers. Only plates referenced in the array will be unlid. The
+    # validated input string is passed through as-is, not re-serialised.
     liquid_handling = RoutineReference(
         routine_name="hackathon_transfer_samples",
         routine_parameters={
             "reagent_name":                      reagent_name,
             "experiment_plate_barcode":          plate_barcode,
             "cell_culture_stock_plate_barcode":  cell_culture_stock_plate_barcode,
-            "transfer_array":                    json.dumps(transfers),
+            "transfer_array":                    transfer_array or "[]",
         },
     )
     workflow.add_routine("liquid_handling", liquid_handling)